@@ -0,0 +1,333 @@
+"""
+engine.py
+
+One persona agent driven by a declarative PersonaSpec (agents/personas.py).
+
+Shared, immutable, loaded once per process:
+- the PersonaSpec itself
+- the system prompt (personas.load_prompt)
+- the compiled anchor-phrase matcher (repetition.matcher_for)
+
+Per instance (kept small with __slots__): history, turn counter, last opener,
+recent anchors, structure mode, stance summary. An NGramIndex and AzureLLM
+can be passed in to share them across agents and debates.
+
+Per turn: pick format -> pick structure mode -> build prompt (PROMPT_BUILDERS)
+-> ONE LLM call (n candidates if enabled, reranked locally) -> POSTPROCESSORS
+-> update local memory (NO LLM), plus an optional stance-summary call.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents import rerank
+from agents.llm_wrapper import AzureLLM
+from agents.personas import PersonaSpec, load_prompt
+from agents.repetition import NGramIndex, PhraseMatcher, matcher_for
+
+Messages = List[Dict[str, str]]
+
+
+# ---------------- Post-processors: (text, fmt) -> text ----------------
+
+def _unescape_newlines(text: str, fmt: str) -> str:
+    return text.replace("\\n", "\n")
+
+
+def _strip(text: str, fmt: str) -> str:
+    return text.strip()
+
+
+def _shape_format(text: str, fmt: str) -> str:
+    text = text.strip()
+
+    if fmt == "burst":
+        # Preserve line breaks; trim empty lines
+        lines = [ln.rstrip() for ln in text.splitlines()]
+        lines = [ln for ln in lines if ln.strip()]
+        return "\n".join(lines[:6]).strip()  # cap lines
+
+    # For paragraphs: keep at most 2 paragraphs, but do NOT over-flatten
+    paras = [p.strip() for p in text.split("\n\n") if p.strip()]
+    if fmt == "two_para":
+        return "\n\n".join(paras[:2]).strip()
+
+    # one_para
+    return paras[0] if paras else text
+
+
+POSTPROCESSORS: Dict[str, Callable[[str, str], str]] = {
+    "unescape_newlines": _unescape_newlines,
+    "strip": _strip,
+    "shape_format": _shape_format,
+}
+
+
+# ---------------- Prompt builders ----------------
+# (agent, opponent_message, topic, round_num, fmt, mode) -> (messages, user text to store)
+
+def _compress_opponent(text: str, max_chars: int) -> str:
+    t = re.sub(r"\s+", " ", text).strip()
+    if len(t) <= max_chars:
+        return t
+    return t[: max_chars - 3].rstrip() + "..."
+
+
+def _build_compact_user(agent: "PersonaAgent", opponent_message: str, topic: str,
+                        round_num: Optional[int], fmt: str, mode: str) -> Tuple[Messages, str]:
+    """
+    Persona + style live in the system prompt; the user turn is short and reactive,
+    and a compressed copy of it (not the raw opponent wall-of-text) goes into history.
+    """
+    spec = agent.spec
+    opponent = opponent_message
+    if spec.opponent_max_chars:
+        opponent = _compress_opponent(opponent_message, spec.opponent_max_chars)
+
+    user = (
+        f"Topic: {topic}. "
+        f"{('Round ' + str(round_num) + '.') if round_num is not None else ''}\n"
+        f"Opponent:\n{opponent}\n\n"
+    )
+    user += "".join(line + "\n" for line in spec.instructions)
+    if fmt:
+        user += f"Use format {fmt} this turn.\n"
+    if mode:
+        user += f"Use structure mode {mode} this turn.\n"
+    user += agent._avoid_hints()
+
+    messages: Messages = [{"role": "system", "content": agent.system_prompt}]
+    messages.extend(agent._recent_history())
+    messages.append({"role": "user", "content": user})
+    return messages, user
+
+
+def _build_director_note(agent: "PersonaAgent", opponent_message: str, topic: str,
+                         round_num: Optional[int], fmt: str, mode: str) -> Tuple[Messages, str]:
+    """
+    Opponent message goes in ONCE as the user turn; a tiny system "director note"
+    after it carries topic/round/format (no opponent text there).
+    """
+    spec = agent.spec
+    messages: Messages = [{"role": "system", "content": agent.system_prompt}]
+    if agent.stance_summary:
+        messages.append({"role": "system", "content": f"Consistency (short):\n{agent.stance_summary}"})
+    messages.extend(agent._recent_history())
+    messages.append({"role": "user", "content": opponent_message})
+
+    r = round_num if round_num is not None else "N/A"
+    note = f"TOPIC: {topic} | ROUND: {r}\n"
+    if fmt:
+        note += f"FORMAT: {fmt}\n"
+    if mode:
+        note += f"STRUCTURE MODE: {mode}\n"
+    note += "".join(line + "\n" for line in spec.instructions)
+    note += agent._avoid_hints()
+    messages.append({"role": "system", "content": note})
+    return messages, opponent_message
+
+
+PROMPT_BUILDERS: Dict[str, Callable[..., Tuple[Messages, str]]] = {
+    "compact_user": _build_compact_user,
+    "director_note": _build_director_note,
+}
+
+
+# ---------------- Agent ----------------
+
+class PersonaAgent:
+    """
+    Generic debate agent. All behavior comes from the spec; the instance only
+    holds turn state.
+    """
+
+    __slots__ = (
+        "spec", "llm", "candidates", "ngram_index",
+        "history", "turn_count", "last_opener", "recent_anchors", "mode_last", "stance_summary",
+    )
+
+    def __init__(self, spec: PersonaSpec, llm: Optional[AzureLLM] = None, candidates: int = 1,
+                 ngram_index: Optional[NGramIndex] = None):
+        self.spec = spec
+        self.llm = llm or AzureLLM()
+        self.candidates = max(1, candidates)
+        self.ngram_index = ngram_index or NGramIndex()  # pass one in to share with the opponent
+
+        self.history: Messages = []
+        self.turn_count: int = 0
+        self.last_opener: str = ""
+        self.recent_anchors: List[str] = []  # small rolling list of phrases to discourage
+        self.mode_last: str = ""
+        self.stance_summary: str = ""        # keep very short
+
+    # Shared state lives in process-wide caches, not on the instance
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def system_prompt(self) -> str:
+        return load_prompt(self.spec.key)
+
+    @property
+    def matcher(self) -> PhraseMatcher:
+        return matcher_for(self.spec.key)
+
+    def respond(self, opponent_message: str, debate_state: Optional[Dict[str, Any]] = None) -> str:
+        debate_state = debate_state or {}
+        topic = debate_state.get("topic", self.spec.default_topic)
+        round_num = debate_state.get("round")
+
+        self.turn_count += 1
+        fmt = self._pick_format(opponent_message, round_num)
+        mode = self._choose_mode()
+
+        build = PROMPT_BUILDERS[self.spec.prompt_style]
+        messages, stored_user = build(self, opponent_message, topic, round_num, fmt, mode)
+        response = self._generate(messages, fmt, round_num)
+
+        self._append_turn(stored_user, response)
+        self._update_local_memory(response)
+        if self.spec.stance_summary:
+            self._update_stance_summary(response)
+        return response
+
+    # ---------------- Sampling control ----------------
+
+    def _sampling(self, round_num: Optional[int], fmt: str) -> Dict[str, Any]:
+        spec = self.spec
+        temp = spec.base_temperature
+        if round_num is not None:
+            for bound, t in spec.round_temperatures:
+                if bound is None or round_num < bound:
+                    temp = t
+                    break
+        max_tokens = spec.max_tokens
+        for name, tokens in spec.format_max_tokens:
+            if name == fmt:
+                max_tokens = tokens
+        return {
+            "temperature": temp,
+            "max_tokens": max_tokens,
+            "presence_penalty": spec.presence_penalty,
+            "frequency_penalty": spec.frequency_penalty,
+        }
+
+    def _pick_format(self, opponent_message: str, round_num: Optional[int]) -> str:
+        spec = self.spec
+        if not spec.format_weights:
+            return ""
+        weights = dict(spec.format_weights)
+
+        if spec.short_opponent_chars and len(opponent_message.strip()) < spec.short_opponent_chars:
+            for name, delta in spec.short_opponent_shift:
+                weights[name] += delta
+
+        if spec.late_round is not None and round_num is not None and round_num >= spec.late_round:
+            for name, delta, lo, hi in spec.late_round_shift:
+                weights[name] = min(max(weights[name] + delta, lo), hi)
+
+        # Normalize + sample
+        total = sum(max(v, 0.01) for v in weights.values())
+        r = random.random() * total
+        acc = 0.0
+        for name, w in weights.items():
+            acc += max(w, 0.01)
+            if r <= acc:
+                return name
+        return spec.format_weights[0][0]
+
+    def _choose_mode(self) -> str:
+        """
+        Rotate structure modes without repeating the last mode.
+        Simple deterministic rotation based on turn_count.
+        """
+        modes = self.spec.structure_modes
+        if not modes:
+            return ""
+        idx = (self.turn_count - 1) % len(modes)
+        mode = modes[idx]
+        if mode == self.mode_last:
+            mode = modes[(idx + 1) % len(modes)]
+        self.mode_last = mode
+        return mode
+
+    # ---------------- Generation ----------------
+
+    def _generate(self, messages: Messages, fmt: str, round_num: Optional[int]) -> str:
+        cfg = self._sampling(round_num, fmt)
+        if self.candidates == 1:
+            return self._postprocess(self.llm.chat(messages, **cfg), fmt)
+
+        outs = [self._postprocess(o, fmt) for o in self.llm.chat_candidates(messages, self.candidates, **cfg)]
+        target = None
+        for name, words in self.spec.target_words:
+            if name == fmt:
+                target = words
+        ctx = rerank.RerankContext(
+            prev_ngrams=self.ngram_index.ngrams(self.spec.key),
+            anchors=self.recent_anchors,
+            matcher=self.matcher,
+            last_opener=self.last_opener,
+            target_words=target,
+            fmt=fmt or None,
+        )
+        return rerank.best(outs, ctx)
+
+    def _postprocess(self, text: str, fmt: str) -> str:
+        for name in self.spec.postprocessors:
+            text = POSTPROCESSORS[name](text, fmt)
+        return text
+
+    # ---------------- Memory (NO LLM except stance summary) ----------------
+
+    def _recent_history(self) -> Messages:
+        n = self.spec.history_context
+        return self.history[-n:] if self.history and n else []
+
+    def _append_turn(self, user: str, response: str) -> None:
+        self.history.append({"role": "user", "content": user})
+        self.history.append({"role": "assistant", "content": response})
+        if len(self.history) > self.spec.history_keep:
+            self.history = self.history[-self.spec.history_keep:]
+
+    def _avoid_hints(self) -> str:
+        hints = ""
+        if self.spec.opener_hint and self.last_opener:
+            hints += f"Avoid starting like last time (last opener: {self.last_opener}).\n"
+        avoid = self.recent_anchors[-3:] + self.ngram_index.avoid_list(self.spec.key, 2)
+        if avoid:
+            hints += self.spec.avoid_label + "; ".join(avoid) + "\n"
+        return hints
+
+    def _update_local_memory(self, response: str) -> None:
+        # last_opener = first ~8 words (lowercased)
+        self.last_opener = " ".join(rerank.words(response)[:rerank.OPENER_WORDS])
+
+        # Anchors from the persona's phrase file; most recent last
+        for used in self.matcher.find(response):
+            if used in self.recent_anchors:
+                self.recent_anchors.remove(used)
+            self.recent_anchors.append(used)
+        if len(self.recent_anchors) > 8:
+            self.recent_anchors = self.recent_anchors[-8:]
+
+        self.ngram_index.add(self.spec.key, response)
+
+    def _update_stance_summary(self, latest_response: str) -> None:
+        summary_prompt = [
+            {"role": "system", "content": "6–10 word stance snippet. No full sentence."},
+            {"role": "user", "content": latest_response},
+        ]
+        try:
+            short = self.llm.chat(summary_prompt, temperature=0.6, max_tokens=25).strip()
+            short = short.lstrip("-•").strip()
+            if short:
+                lines = [ln.strip() for ln in self.stance_summary.splitlines() if ln.strip()]
+                lines.append(f"- {short}")
+                self.stance_summary = "\n".join(lines[-3:])
+        except Exception:
+            pass
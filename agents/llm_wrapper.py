@@ -1,23 +1,77 @@
 import os
-from typing import List, Dict
+import threading
+import time
+from typing import Any, List, Dict, Optional
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 
-load_dotenv()  
+load_dotenv()
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    - rate: requests per second refilled into the bucket
+    - burst: bucket size (how many calls may go out back-to-back)
+    A rate of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may go out. Returns seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
 
 
 class AzureLLM:
-    def __init__(self):
+    def __init__(self, client: Optional[AzureOpenAI] = None, rate_limiter: Optional[RateLimiter] = None):
         self.endpoint = os.environ["AZURE_OPENAI_ENDPOINT"]
         self.api_key = os.environ["AZURE_OPENAI_API_KEY"]
         self.api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
         self.deployment = os.environ["AZURE_OPENAI_DEPLOYMENT"]
 
-        self.client = AzureOpenAI(
+        # One AzureOpenAI client owns one HTTP connection pool; pass it in to share it.
+        self.client = client or AzureOpenAI(
             azure_endpoint=self.endpoint,
             api_key=self.api_key,
             api_version=self.api_version,
         )
+        self.rate_limiter = rate_limiter or RateLimiter(
+            float(os.environ.get("AZURE_OPENAI_MAX_RPS", "0")),
+            int(os.environ.get("AZURE_OPENAI_BURST", "1")),
+        )
+        # Token usage of the last call made by *this thread* (the instance may be shared)
+        self._local = threading.local()
+
+    @property
+    def last_usage(self) -> Optional[Dict[str, Any]]:
+        return getattr(self._local, "usage", None)
+
+    def _record_usage(self, resp) -> None:
+        usage = getattr(resp, "usage", None)
+        self._local.usage = None if usage is None else {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
 
     def chat(
       self,
@@ -27,6 +81,7 @@ class AzureLLM:
       presence_penalty: float = 0.0,
       frequency_penalty: float = 0.4,
       ) -> str:
+      self.rate_limiter.acquire()
       resp = self.client.chat.completions.create(
          model=self.deployment,
          messages=messages,
@@ -35,4 +90,28 @@ class AzureLLM:
          presence_penalty=presence_penalty,
          frequency_penalty=frequency_penalty,
       )
-      return resp.choices[0].message.content
\ No newline at end of file
+      self._record_usage(resp)
+      return resp.choices[0].message.content
+
+    def chat_candidates(
+        self,
+        messages: List[Dict[str, str]],
+        n: int,
+        temperature: float = 0.,
+        max_tokens: int = 300,
+        presence_penalty: float = 0.0,
+        frequency_penalty: float = 0.4,
+    ) -> List[str]:
+        """Sample n completions in ONE request (the `n` parameter); same round trip as chat()."""
+        self.rate_limiter.acquire()
+        resp = self.client.chat.completions.create(
+            model=self.deployment,
+            messages=messages,
+            n=n,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+        )
+        self._record_usage(resp)
+        return [c.message.content or "" for c in resp.choices]
@@ -1,16 +1,128 @@
 '''*************************************************************************
 personas.py
-This file defines the personas for the presidential debate. Each persona has a name and a system prompt that guides the behavior of the persona during the debate.
+This file defines the personas for the presidential debate. Each persona is a
+declarative PersonaSpec: prompt + phrase files, sampling schedule, format
+weights, history budget, prompt style and post-processors. agents/engine.py
+turns a spec into a working agent; adding a persona means adding a spec here.
 *************************************************************************'''
 
-PERSONAS = {
-    "biden": {
-        "name": "Biden",
-        "prompt_path": "agents/prompts/biden_system.txt",
-    },
-
-    "trump": {
-        "name": "Trump",
-        "prompt_path": "agents/prompts/trump_system.txt",
-    }
-}
\ No newline at end of file
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Prompt paths are relative to the repo root, not the current working directory.
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class PersonaSpec:
+    key: str
+    name: str
+    prompt_path: str
+    phrases_path: str
+
+    # Prompt construction ("compact_user" or "director_note", see engine.PROMPT_BUILDERS)
+    prompt_style: str
+    instructions: Tuple[str, ...]            # fixed per-turn instruction lines
+    default_topic: str = "general"
+    avoid_label: str = "Avoid reusing these exact phrases: "
+    opener_hint: bool = False                # remind the model of its last opener
+    opponent_max_chars: int = 0              # 0 = send opponent text as-is
+    structure_modes: Tuple[str, ...] = ()    # rotated without repeating, e.g. A/B/C/D
+
+    # Sampling schedule: base temperature when the round is unknown, else the
+    # first (round_upper_bound, temperature) whose bound is None or > round.
+    base_temperature: float = 0.7
+    round_temperatures: Tuple[Tuple[Optional[int], float], ...] = ()
+    presence_penalty: float = 0.0
+    frequency_penalty: float = 0.4
+    max_tokens: int = 300
+
+    # Output formats (empty = single free-form format)
+    format_weights: Tuple[Tuple[str, float], ...] = ()
+    format_max_tokens: Tuple[Tuple[str, int], ...] = ()
+    short_opponent_chars: int = 0            # opponent shorter than this -> short_opponent_shift
+    short_opponent_shift: Tuple[Tuple[str, float], ...] = ()
+    late_round: Optional[int] = None         # round >= late_round -> late_round_shift
+    late_round_shift: Tuple[Tuple[str, float, float, float], ...] = ()  # (fmt, delta, lo, hi)
+
+    # Reranking targets, keyed by format ("" = no format)
+    target_words: Tuple[Tuple[str, Tuple[int, int]], ...] = ()
+
+    # Memory
+    history_keep: int = 4                    # messages stored
+    history_context: int = 4                 # messages sent per turn
+    stance_summary: bool = False             # extra short LLM call for a consistency note
+
+    # Applied in order to every generated candidate (engine.POSTPROCESSORS)
+    postprocessors: Tuple[str, ...] = ("unescape_newlines", "strip")
+
+
+PERSONAS: Dict[str, PersonaSpec] = {
+    "biden": PersonaSpec(
+        key="biden",
+        name="Biden",
+        prompt_path="agents/prompts/biden_system.txt",
+        phrases_path="agents/prompts/biden_phrases.txt",
+        prompt_style="compact_user",
+        instructions=(
+            "Reply as Joe Biden in a live debate. Keep it reactive and natural.",
+            "Target 120–180 words (occasionally 90–130 for punchy turns).",
+        ),
+        default_topic="general issues",
+        opener_hint=True,
+        opponent_max_chars=650,
+        structure_modes=("A", "B", "C", "D"),
+        base_temperature=0.65,               # helps human variation
+        presence_penalty=0.15,
+        frequency_penalty=0.35,
+        max_tokens=260,                      # keeps it tighter; still enough for 180 words
+        target_words=(("", (90, 180)),),
+        history_keep=12,
+        history_context=6,                   # last 3 exchanges
+    ),
+
+    "trump": PersonaSpec(
+        key="trump",
+        name="Trump",
+        prompt_path="agents/prompts/trump_system.txt",
+        phrases_path="agents/prompts/trump_phrases.txt",
+        prompt_style="director_note",
+        instructions=(
+            "React live. No 'you said' opener. No quoting.",
+            "Include one concrete detail.",
+        ),
+        avoid_label="Don't reuse: ",
+        base_temperature=0.85,
+        round_temperatures=((3, 0.80), (6, 0.88), (None, 0.92)),
+        presence_penalty=0.6,
+        frequency_penalty=0.3,
+        max_tokens=105,
+        format_weights=(("one_para", 0.55), ("two_para", 0.25), ("burst", 0.20)),
+        format_max_tokens=(("one_para", 105), ("two_para", 135), ("burst", 95)),
+        short_opponent_chars=140,            # short opponent -> burst much more likely
+        short_opponent_shift=(("burst", 0.20), ("one_para", -0.10), ("two_para", -0.10)),
+        late_round=4,
+        late_round_shift=(("burst", 0.10, 0.0, 0.45), ("one_para", -0.07, 0.25, 1.0)),
+        target_words=(("one_para", (35, 80)), ("two_para", (50, 100)), ("burst", (15, 70))),
+        history_keep=4,                      # last 2 exchanges
+        history_context=4,
+        stance_summary=True,
+        postprocessors=("unescape_newlines", "strip", "shape_format"),
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def load_prompt(persona: str) -> str:
+    """Read a persona's system prompt once; every agent instance shares the same string."""
+    return (ROOT / PERSONAS[persona].prompt_path).read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def load_phrases(persona: str) -> tuple:
+    """Anchor phrases for a persona (blank lines and # comments skipped), lowercased."""
+    text = (ROOT / PERSONAS[persona].phrases_path).read_text(encoding="utf-8")
+    lines = (ln.strip().lower() for ln in text.splitlines())
+    return tuple(ln for ln in lines if ln and not ln.startswith("#"))
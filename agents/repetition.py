@@ -0,0 +1,139 @@
+"""
+repetition.py
+
+Shared repetition tracking (NO LLM).
+
+- PhraseMatcher: Aho-Corasick automaton over a persona's anchor phrases.
+  Built once per persona (matcher_for), then one pass over a reply finds every
+  anchor in it, however many anchors there are.
+- NGramIndex: incremental word n-gram counts over every reply in a debate,
+  per speaker. Adding a reply costs O(reply length); asking for a speaker's
+  avoid-list costs O(k), no matter how long the debate has run.
+
+One NGramIndex is meant to be shared by both agents of a debate.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from typing import AbstractSet, Deque, Dict, Iterable, List, Tuple
+
+from agents.personas import load_phrases
+from agents.rerank import NGRAM, words
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in "'’_"
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick phrase matcher (case-insensitive). A hit only counts when it
+    starts and ends on a word boundary, so "huge" does not match "hugely".
+    """
+
+    __slots__ = ("phrases", "_lengths", "_goto", "_fail", "_out")
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: Tuple[str, ...] = tuple(dict.fromkeys(p.lower() for p in phrases if p))
+        self._lengths: Tuple[int, ...] = tuple(len(p) for p in self.phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._fail: List[int] = [0]
+
+        # Trie
+        outs: List[List[int]] = [[]]
+        for pid, phrase in enumerate(self.phrases):
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outs.append([])
+                node = nxt
+            outs[node].append(pid)
+
+        # Failure links (BFS), merging outputs along the way
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                outs[nxt].extend(outs[self._fail[nxt]])
+        self._out = [tuple(o) for o in outs]
+
+    def find(self, text: str) -> List[str]:
+        """Distinct whole-word phrases present in text, in order of first appearance."""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        lower = text.lower()
+        end = len(lower)
+        node = 0
+        seen: Dict[int, None] = {}
+        for i, ch in enumerate(lower):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                start = i - lengths[pid] + 1
+                if (start == 0 or not _is_word_char(lower[start - 1])) and \
+                        (i + 1 == end or not _is_word_char(lower[i + 1])):
+                    seen.setdefault(pid, None)
+        return [self.phrases[pid] for pid in seen]
+
+
+@lru_cache(maxsize=None)
+def matcher_for(persona: str) -> PhraseMatcher:
+    """Compiled matcher for a persona's phrase file; shared by every agent instance."""
+    return PhraseMatcher(load_phrases(persona))
+
+
+class NGramIndex:
+    """
+    Debate-wide n-gram counts, per speaker.
+    An n-gram a speaker says a second time goes to the front of that speaker's
+    bounded `repeated` deque, which is what avoid_list() reads.
+    """
+
+    def __init__(self, n: int = NGRAM, keep: int = 16):
+        self.n = n
+        self.keep = keep
+        self._counts: Dict[str, Dict[Tuple[str, ...], int]] = {}
+        self._repeated: Dict[str, Deque[Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, speaker: str, text: str) -> None:
+        tokens = words(text)
+        # Distinct n-grams in reading order (a set would make avoid-lists vary run to run)
+        grams = dict.fromkeys(tuple(tokens[i:i + self.n]) for i in range(len(tokens) - self.n + 1))
+        with self._lock:
+            counts = self._counts.setdefault(speaker, {})
+            repeated = self._repeated.setdefault(speaker, deque(maxlen=self.keep))
+            for g in grams:
+                c = counts.get(g, 0) + 1
+                counts[g] = c
+                if c >= 2:
+                    if g in repeated:
+                        repeated.remove(g)
+                    repeated.appendleft(g)
+
+    def avoid_list(self, speaker: str, k: int = 3) -> List[str]:
+        """Most recently repeated n-grams for speaker, newest first."""
+        repeated = self._repeated.get(speaker)
+        if not repeated:
+            return []
+        return [" ".join(g) for g in islice(repeated, k)]
+
+    def ngrams(self, speaker: str) -> AbstractSet[Tuple[str, ...]]:
+        """Every n-gram the speaker has used so far (live view)."""
+        return self._counts.get(speaker, {}).keys()
@@ -0,0 +1,159 @@
+"""
+rerank.py
+
+Local (NO LLM) scoring for multi-candidate turns.
+
+An agent asks for n candidates in one chat call (AzureLLM.chat_candidates) and
+keeps the one with the lowest penalty. Every scorer is a cheap set/regex pass:
+- n-gram overlap with the agent's previous replies
+- reuse of anchor phrases the agent has already leaned on (whole words, via
+  the same compiled PhraseMatcher that builds the prompt's avoid-list)
+- opener similarity with the last reply
+- fit to the target word count and output format
+
+Context that is the same for every candidate (previous n-grams, opener words)
+is built once per turn in RerankContext, so scoring a candidate stays well
+under a millisecond.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"[A-Za-z']+|[0-9]+")
+
+NGRAM = 3
+OPENER_WORDS = 8
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "ngram": 3.0,
+    "anchor": 1.0,
+    "opener": 2.0,
+    "length": 1.5,
+    "format": 2.0,
+}
+
+
+def words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD_RE.findall(text)]
+
+
+def ngrams(tokens: List[str], n: int = NGRAM) -> Set[Tuple[str, ...]]:
+    return {tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)}
+
+
+class RerankContext:
+    """Per-turn state shared by every candidate."""
+
+    __slots__ = ("prev_ngrams", "anchors", "matcher", "opener", "target_words", "fmt")
+
+    def __init__(
+        self,
+        previous_replies: Iterable[str] = (),
+        anchors: Iterable[str] = (),
+        last_opener: str = "",
+        target_words: Optional[Tuple[int, int]] = None,
+        fmt: Optional[str] = None,
+        prev_ngrams: Optional[AbstractSet[Tuple[str, ...]]] = None,
+        matcher=None,
+    ):
+        # prev_ngrams: precomputed set (e.g. NGramIndex.ngrams) instead of re-tokenizing replies
+        if prev_ngrams is None:
+            prev: Set[Tuple[str, ...]] = set()
+            for reply in previous_replies:
+                prev |= ngrams(words(reply))
+            prev_ngrams = prev
+        self.prev_ngrams = prev_ngrams
+        self.anchors = frozenset(a.lower() for a in anchors)
+        # matcher: compiled PhraseMatcher covering the anchors (e.g. repetition.matcher_for);
+        # built from the anchors if omitted. Imported here: repetition imports this module.
+        if matcher is None and self.anchors:
+            from agents.repetition import PhraseMatcher
+            matcher = PhraseMatcher(self.anchors)
+        self.matcher = matcher
+        self.opener = set(words(last_opener)[:OPENER_WORDS])
+        self.target_words = target_words
+        self.fmt = fmt
+
+
+# ---------------- Scorers (0 = good, higher = worse) ----------------
+
+def ngram_overlap(tokens: List[str], ctx: RerankContext) -> float:
+    """Fraction of the candidate's trigrams already said in earlier replies."""
+    grams = ngrams(tokens)
+    if not grams or not ctx.prev_ngrams:
+        return 0.0
+    return len(grams & ctx.prev_ngrams) / len(grams)
+
+
+def anchor_reuse(text: str, ctx: RerankContext) -> float:
+    """How many already-used anchor phrases the candidate repeats as whole words (capped at 1.0)."""
+    if not ctx.anchors:
+        return 0.0
+    hits = len(ctx.anchors.intersection(ctx.matcher.find(text)))
+    return min(hits / 3.0, 1.0)
+
+
+def opener_similarity(tokens: List[str], ctx: RerankContext) -> float:
+    """Jaccard similarity between this opener and the last one."""
+    if not ctx.opener:
+        return 0.0
+    opener = set(tokens[:OPENER_WORDS])
+    if not opener:
+        return 0.0
+    return len(opener & ctx.opener) / len(opener | ctx.opener)
+
+
+def length_fit(tokens: List[str], ctx: RerankContext) -> float:
+    """Relative distance outside the target word range (0 inside it)."""
+    if not ctx.target_words:
+        return 0.0
+    lo, hi = ctx.target_words
+    n = len(tokens)
+    if n < lo:
+        return (lo - n) / lo
+    if n > hi:
+        return (n - hi) / hi
+    return 0.0
+
+
+def format_fit(text: str, ctx: RerankContext) -> float:
+    """Does the shape match the requested format (one_para / two_para / burst)?"""
+    if not ctx.fmt:
+        return 0.0
+    if ctx.fmt == "burst":
+        lines = [ln for ln in text.splitlines() if ln.strip()]
+        return 0.0 if 2 <= len(lines) <= 6 else 1.0
+    paras = [p for p in text.split("\n\n") if p.strip()]
+    want = 2 if ctx.fmt == "two_para" else 1
+    return min(abs(len(paras) - want), 1)
+
+
+# ---------------- Ranking ----------------
+
+def score(text: str, ctx: RerankContext, weights: Optional[Dict[str, float]] = None) -> float:
+    w = weights or DEFAULT_WEIGHTS
+    tokens = words(text)
+    if not tokens:
+        return float("inf")
+    return (
+        w["ngram"] * ngram_overlap(tokens, ctx)
+        + w["anchor"] * anchor_reuse(text, ctx)
+        + w["opener"] * opener_similarity(tokens, ctx)
+        + w["length"] * length_fit(tokens, ctx)
+        + w["format"] * format_fit(text, ctx)
+    )
+
+
+def rank(candidates: List[str], ctx: RerankContext, weights: Optional[Dict[str, float]] = None) -> List[Tuple[float, str]]:
+    """Candidates sorted best-first; ties keep the API's order."""
+    scored = [(score(c, ctx, weights), i, c) for i, c in enumerate(candidates)]
+    scored.sort(key=lambda t: (t[0], t[1]))
+    return [(s, c) for s, _, c in scored]
+
+
+def best(candidates: List[str], ctx: RerankContext, weights: Optional[Dict[str, float]] = None) -> str:
+    if not candidates:
+        return ""
+    return rank(candidates, ctx, weights)[0][1]
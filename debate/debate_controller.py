@@ -1,5 +1,7 @@
 import time
 from agents import TrumpAgent, BidenAgent
+from agents.llm_wrapper import AzureLLM
+from debate.transcript import RecordingLLM, TranscriptWriter
 from speech import speak_input, speak_output
 from speech.text_to_speech_microsoft import TRUMP_VOICE, BIDEN_VOICE
 
@@ -39,19 +41,32 @@ def wait_for_input(timeout=180):
 class DebateController():
     TOPICS = ["economics", "healthcare", "immigration"]
 
-    def __init__(self, debater, topics=None):
+    def __init__(self, debater, topics=None, record=None):
         self.debater = debater.lower()
         self.topics = topics or self.TOPICS
         self.voice = TRUMP_VOICE if self.debater == "trump" else BIDEN_VOICE
 
+        # Optional transcript (see debate/transcript.py)
+        self.transcript = None
+        self.recorder = None
+        llm = AzureLLM()
+        if record:
+            self.transcript = TranscriptWriter(record, label=f"{self.debater} live",
+                                               meta={"topics": list(self.topics)})
+            llm = self.recorder = RecordingLLM(llm)
+
         if self.debater == "trump":
-            self.agent = TrumpAgent()
+            self.agent = TrumpAgent(llm=llm)
         else:
-            self.agent = BidenAgent()
+            self.agent = BidenAgent(llm=llm)
 
-    def speak(self, prompt):
+    def speak(self, prompt, phase=""):
         """Generate response, print it, speak it, wait until fully done."""
+        start = time.perf_counter()
         response = self.agent.respond(prompt)
+        if self.transcript is not None:
+            self.transcript.write_turn(self.debater, phase, prompt, {}, response,
+                                       self.recorder.take(), time.perf_counter() - start)
         print(f"\n[{self.debater.upper()}]: {response}\n")
         speak_output.say(response)
 
@@ -77,35 +92,37 @@ class DebateController():
 
         # ── Opening statements ──────────────────────────────────────────────
         if self.debater == "trump":
-            self.speak("Give your opening statement.")
+            self.speak("Give your opening statement.", phase="opening")
             wait_for_input()
         else:
             opponent_statement = wait_for_input()
-            self.speak(f"Trump said: {opponent_statement}. Give your opening statement.")
+            self.speak(f"Trump said: {opponent_statement}. Give your opening statement.", phase="opening")
 
         # ── Policy rounds ───────────────────────────────────────────────────
         for topic in self.topics:
             print(f"\n--- Topic: {topic} ---\n")
 
             if self.debater == "trump":
-                self.speak(f"Give your statement on {topic}.")
+                self.speak(f"Give your statement on {topic}.", phase="round")
                 opponent_statement = wait_for_input()
                 time.sleep(5.0)
-                self.speak(f"Biden said: {opponent_statement}. Give your rebuttal on {topic}.")
+                self.speak(f"Biden said: {opponent_statement}. Give your rebuttal on {topic}.", phase="round")
             else:
                 opponent_statement = wait_for_input()
-                self.speak(f"Trump said: {opponent_statement}. Respond on {topic}.")
+                self.speak(f"Trump said: {opponent_statement}. Respond on {topic}.", phase="round")
                 opponent_statement = wait_for_input()
-                self.speak(f"Trump said: {opponent_statement}. Give your rebuttal on {topic}.")
+                self.speak(f"Trump said: {opponent_statement}. Give your rebuttal on {topic}.", phase="round")
 
         # ── Closing statements ──────────────────────────────────────────────
         if self.debater == "biden":
-            self.speak("Give your closing statement.")
+            self.speak("Give your closing statement.", phase="closing")
         else:
             opponent_statement = wait_for_input()
-            self.speak(f"Biden said: {opponent_statement}. Give your closing statement.")
+            self.speak(f"Biden said: {opponent_statement}. Give your closing statement.", phase="closing")
 
         print(f"\n[{self.debater.upper()}] Debate complete.")
         # Only stop threads at the very end
         speak_output.stop()
-        speak_input.stop()
\ No newline at end of file
+        speak_input.stop()
+        if self.transcript is not None:
+            self.transcript.close()
\ No newline at end of file
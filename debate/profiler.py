@@ -0,0 +1,173 @@
+"""
+profiler.py
+
+Low-overhead in-process sampling profiler for live debate runs (main.py --profile).
+
+A daemon thread wakes every `interval` seconds, grabs every thread's current
+Python stack (sys._current_frames) and counts it. Nothing is hooked into the
+profiled code, so the controller/agent (MainThread) and the speech threads
+("stt", "tts") run at full speed; cost is one stack walk per thread per tick.
+
+Each sample is tagged cpu or wait:
+- by how much CPU time the thread burned since the previous tick versus wall
+  time; a thread's first tick only records its CPU baseline and is not counted
+- wait means off-CPU: blocked on the GIL, a lock, network/Azure I/O or sleep.
+  Python can't tell GIL waits apart from other waits from outside the thread.
+
+The split needs per-thread CPU clocks (time.pthread_getcpuclockid), which
+Python only provides on Linux and some other Unixes, NOT on macOS or Windows.
+There every sample is tagged "wall" (stacks only, no cpu/wait split) and
+SamplingProfiler.cpu_split is False so callers can warn.
+
+Output at stop():
+- <path>           collapsed stacks ("thread;state;outer;...;inner count"),
+                   ready for flamegraph.pl / speedscope / inferno
+- <path>.top.txt   per-thread cpu/wait split + top-N hot functions
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+Frame = Tuple[str, str, int]  # (filename, function, first line)
+
+_HAS_THREAD_CLOCKS = hasattr(time, "pthread_getcpuclockid")  # Linux; not macOS/Windows
+
+
+def _thread_cpu(ident: int) -> Optional[float]:
+    if not _HAS_THREAD_CLOCKS:
+        return None
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (OSError, OverflowError):  # thread exited between enumerate() and here
+        return None
+
+
+def _label(frame: Frame) -> str:
+    filename, func, line = frame
+    return f"{func} ({os.path.basename(filename)}:{line})"
+
+
+class SamplingProfiler:
+    cpu_split = _HAS_THREAD_CLOCKS  # False: samples are "wall", no cpu/wait split
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()   # (thread, state, frames) -> samples
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._last_cpu: Dict[int, Tuple[float, float]] = {}  # ident -> (cpu, wall)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- Control ----------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self.started
+
+    # ---------------- Sampling ----------------
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack: List[Frame] = []
+                f = frame
+                while f is not None and len(stack) < self.max_depth:
+                    code = f.f_code
+                    stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                    f = f.f_back
+                stack.reverse()
+                state = self._state(ident, now)
+                if state is None:  # first sight of this thread: only a CPU baseline
+                    continue
+                self.stacks[(names.get(ident, str(ident)), state, tuple(stack))] += 1
+            self.samples += 1
+
+    def _state(self, ident: int, now: float) -> Optional[str]:
+        """cpu/wait since the previous tick; None on a thread's first tick (no delta yet)."""
+        cpu = _thread_cpu(ident)
+        if cpu is None:
+            return "wall"
+        prev = self._last_cpu.get(ident)
+        self._last_cpu[ident] = (cpu, now)
+        if prev is None:
+            return None
+        cpu_delta, wall_delta = cpu - prev[0], now - prev[1]
+        return "cpu" if wall_delta > 0 and cpu_delta / wall_delta >= 0.5 else "wait"
+
+    # ---------------- Reports ----------------
+
+    def collapsed(self) -> List[str]:
+        lines = []
+        for (thread, state, stack), count in self.stacks.most_common():
+            parts = [thread, state] + [_label(fr) for fr in stack]
+            lines.append(";".join(p.replace(";", ",") for p in parts) + f" {count}")
+        return lines
+
+    def summary(self, top: int = 25) -> str:
+        per_thread: Dict[str, Counter] = {}
+        self_count: Counter = Counter()
+        total_count: Counter = Counter()
+        state_count: Dict[Frame, Counter] = {}
+        for (thread, state, stack), count in self.stacks.items():
+            per_thread.setdefault(thread, Counter())[state] += count
+            if not stack:
+                continue
+            self_count[stack[-1]] += count
+            state_count.setdefault(stack[-1], Counter())[state] += count
+            for fr in set(stack):
+                total_count[fr] += count
+
+        tick = self.elapsed / self.samples if self.samples else self.interval
+        out = [
+            f"Sampling profile: {self.samples} ticks over {self.elapsed:.1f}s "
+            f"(interval {self.interval * 1000:.1f}ms, ~{tick * 1000:.1f}ms/tick actual)",
+            "",
+            f"{'thread':<20} {'samples':>8} {'cpu':>7} {'wait':>7}",
+        ]
+        for thread, c in sorted(per_thread.items(), key=lambda kv: -sum(kv[1].values())):
+            n = sum(c.values())
+            out.append(f"{thread:<20} {n:>8} {c['cpu'] / n:>6.0%} {c['wait'] / n:>6.0%}"
+                       + ("   (no per-thread CPU clock)" if c["wall"] else ""))
+        out += ["", f"Top {top} functions by self samples (~seconds = samples x tick):",
+                f"{'self':>7} {'total':>7} {'~self_s':>8} {'cpu':>6}  function"]
+        for fr, n in self_count.most_common(top):
+            cpu_share = state_count[fr]["cpu"] / n
+            out.append(f"{n:>7} {total_count[fr]:>7} {n * tick:>8.2f} {cpu_share:>6.0%}  {_label(fr)}")
+        return "\n".join(out)
+
+    def write(self, path: str, top: int = 25) -> Tuple[str, str]:
+        """Write collapsed stacks to path and the summary to path + '.top.txt'."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        summary_path = path + ".top.txt"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self.summary(top) + "\n")
+        return path, summary_path
@@ -0,0 +1,258 @@
+"""
+server.py
+
+Local HTTP service that hosts many text-only debates at once.
+
+Run:
+    python -m debate.server --port 8000 --workers 8 --rps 5
+
+Endpoints (JSON unless noted):
+    POST   /sessions                 {"topics": [...], "candidates": n} -> create a session
+    GET    /sessions                 list sessions + per-session latency
+    GET    /sessions/<id>            one session's stats and turns
+    POST   /sessions/<id>/step       generate the next turn synchronously
+    POST   /sessions/<id>/start      run the rest of the debate in the background
+    GET    /sessions/<id>/stream     stream turns as they are generated
+                                     (Server-Sent Events, or WebSocket if the
+                                     client sends "Upgrade: websocket").
+                                     Passive: replays past turns, then waits;
+                                     only /start or /step generate turns.
+                                     A failed run sends an "error" event and
+                                     the stream stays open for a retry.
+                                     Idle streams get a keepalive every
+                                     STREAM_PING_S (SSE comment / WS ping).
+    DELETE /sessions/<id>            drop a session
+    GET    /stats                    aggregate latency across sessions
+
+Every session shares one AzureLLM (connection pool + rate limiter), the cached
+system prompts and one worker pool; only agent state is per session.
+With --record-dir each session also writes a transcript (debate/transcript.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import queue
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from agents.llm_wrapper import AzureLLM, RateLimiter
+from debate.session import STREAM_END, STREAM_ERROR, DebateSession, SessionManager
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STREAM_PING_S = 15.0  # idle streams send a keepalive this often, so dead clients are noticed
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Unmasked server->client frame (RFC 6455), FIN set."""
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", n)
+    else:
+        header += bytes([127]) + struct.pack("!Q", n)
+    return header + payload
+
+
+class DebateRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    manager: SessionManager  # set by make_server()
+
+    # ---------------- Routing ----------------
+
+    def do_GET(self):
+        parts = self._parts()
+        if parts == ["stats"]:
+            return self._json(200, self.manager.stats())
+        if parts == ["sessions"]:
+            return self._json(200, {"sessions": [s.stats() for s in self.manager.sessions()]})
+        session = self._session(parts)
+        if session is None:
+            return
+        if len(parts) == 2:
+            return self._json(200, {**session.stats(), "transcript": list(session.turns)})
+        if len(parts) == 3 and parts[2] == "stream":
+            return self._stream(session)
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self._parts()
+        if parts == ["sessions"]:
+            body = self._body()
+            topics = body.get("topics")
+            if topics is not None and (not isinstance(topics, list) or not all(isinstance(t, str) for t in topics)):
+                return self._json(400, {"error": "topics must be a list of strings"})
+            candidates = body.get("candidates")
+            if candidates is not None and (isinstance(candidates, bool) or not isinstance(candidates, int)
+                                           or not 1 <= candidates <= 8):
+                return self._json(400, {"error": "candidates must be an integer from 1 to 8"})
+            try:
+                session = self.manager.create(topics, candidates)
+            except RuntimeError as exc:
+                return self._json(503, {"error": str(exc)})
+            return self._json(201, session.stats())
+        session = self._session(parts)
+        if session is None:
+            return
+        if len(parts) == 3 and parts[2] == "step":
+            try:
+                turn = session.step()
+            except Exception as exc:
+                return self._json(502, {"error": f"{type(exc).__name__}: {exc}"})
+            if turn is None:
+                return self._json(409, {"error": "debate finished"})
+            return self._json(200, turn)
+        if len(parts) == 3 and parts[2] == "start":
+            started = session.start(self.manager.executor)
+            return self._json(202 if started else 409, session.stats())
+        self._json(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        parts = self._parts()
+        if len(parts) == 2 and parts[0] == "sessions" and self.manager.close(parts[1]):
+            return self._json(200, {"closed": parts[1]})
+        self._json(404, {"error": "unknown session"})
+
+    # ---------------- Streaming ----------------
+
+    def _stream(self, session: DebateSession) -> None:
+        websocket = self.headers.get("Upgrade", "").lower() == "websocket"
+        if websocket:
+            key = self.headers.get("Sec-WebSocket-Key", "")
+            accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+            self.send_response(101)
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+        self.close_connection = True
+
+        backlog, q = session.subscribe()
+        try:
+            for turn in backlog:
+                self._send_event("turn", turn, websocket)
+            while True:
+                try:
+                    item = q.get(timeout=STREAM_PING_S)
+                except queue.Empty:
+                    self._send_ping(websocket)  # raises once the client has gone
+                    continue
+                if item is STREAM_END:
+                    break
+                if item is STREAM_ERROR:  # stays open: a retried /start or /step continues it
+                    self._send_event("error", session.stats(), websocket)
+                    continue
+                self._send_event("turn", item, websocket)
+            self._send_event("end", session.stats(), websocket)
+            if websocket:
+                self.wfile.write(_ws_frame(b"", opcode=0x8))
+        except ConnectionError:  # client went away (broken pipe, reset, aborted)
+            pass
+        finally:
+            session.unsubscribe(q)
+
+    def _send_event(self, event: str, data: Dict[str, Any], websocket: bool) -> None:
+        if websocket:
+            self.wfile.write(_ws_frame(json.dumps({"event": event, "data": data}).encode("utf-8")))
+        else:
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_ping(self, websocket: bool) -> None:
+        if websocket:
+            self.wfile.write(_ws_frame(b"", opcode=0x9))
+        else:
+            self.wfile.write(b": ping\n\n")  # SSE comment, ignored by EventSource
+        self.wfile.flush()
+
+    # ---------------- Helpers ----------------
+
+    def _parts(self):
+        return [p for p in self.path.split("?", 1)[0].split("/") if p]
+
+    def _session(self, parts) -> Optional[DebateSession]:
+        session = self.manager.get(parts[1]) if len(parts) >= 2 and parts[0] == "sessions" else None
+        if session is None:
+            self._json(404, {"error": "unknown session"})
+        return session
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+    def _json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass  # keep the console for debate output
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000, workers: int = 8,
+                rps: float = 0.0, burst: int = 1, max_sessions: int = 500,
+                idle_ttl: float = 3600.0, candidates: int = 1, record_dir: Optional[str] = None,
+                llm: Optional[AzureLLM] = None) -> ThreadingHTTPServer:
+    if llm is None:
+        llm = AzureLLM(rate_limiter=RateLimiter(rps, burst))
+    manager = SessionManager(llm, ThreadPoolExecutor(max_workers=workers),
+                             max_sessions=max_sessions, idle_ttl=idle_ttl, candidates=candidates,
+                             record_dir=record_dir)
+    manager.start_reaper()
+    handler = type("BoundDebateRequestHandler", (DebateRequestHandler,), {"manager": manager})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.manager = manager
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many text-only debates over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=8, help="debates generating at the same time")
+    parser.add_argument("--rps", type=float, default=0.0, help="shared LLM requests/second (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--max-sessions", type=int, default=500)
+    parser.add_argument("--idle-ttl", type=float, default=3600.0,
+                        help="seconds before an idle session is dropped (checked every min(60, ttl/2) s)")
+    parser.add_argument("--candidates", type=int, default=1, help="samples per turn, reranked locally (1 = off)")
+    parser.add_argument("--record-dir", default=None, help="write one transcript per session here")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.workers, args.rps, args.burst,
+                         args.max_sessions, args.idle_ttl, args.candidates, args.record_dir)
+    print(f"Debate server on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.manager.stop_reaper()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
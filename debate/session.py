@@ -0,0 +1,401 @@
+"""
+session.py
+
+Text-only debate sessions for the multi-session server.
+
+Each DebateSession owns its own BidenAgent/TrumpAgent pair and walks the same
+phase order as DebateController.run_debate (opening -> policy rounds -> closing),
+but both sides live in one process and there is no speech I/O.
+
+Shared across sessions (owned by SessionManager):
+- one AzureLLM (HTTP connection pool + rate limiter)
+- cached system prompts (agents.personas.load_prompt)
+- one worker pool that runs debates
+
+Optional: with a record_dir, every session appends its turns to
+<record_dir>/<session id>.jsonl (see debate/transcript.py).
+
+A failed turn doesn't end a session: run() records the error and stops, the
+turn can be retried with /step or /start, and the transcript and any open
+streams stay open until the debate finishes or the session is closed.
+
+Kept cheap when idle:
+- __slots__ on the session
+- agents are only built on the first turn
+- the phase schedule is computed from the turn index, never materialized
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.biden_agent import BidenAgent
+from agents.trump_agent import TrumpAgent
+from agents.llm_wrapper import AzureLLM
+from agents.repetition import NGramIndex
+from debate.transcript import RecordingLLM, TranscriptWriter
+
+DEFAULT_TOPICS = ("economics", "healthcare", "immigration")
+
+# Per-topic turn order, mirroring DebateController.run_debate
+_ROUND_TURNS = (
+    ("trump", "Give your statement on {topic}."),
+    ("biden", "Trump said: {opponent}. Respond on {topic}."),
+    ("trump", "Biden said: {opponent}. Give your rebuttal on {topic}."),
+    ("biden", "Trump said: {opponent}. Give your rebuttal on {topic}."),
+)
+_OPENING_TURNS = (
+    ("trump", "Give your opening statement."),
+    ("biden", "Trump said: {opponent}. Give your opening statement."),
+)
+_CLOSING_TURNS = (
+    ("biden", "Give your closing statement."),
+    ("trump", "Biden said: {opponent}. Give your closing statement."),
+)
+
+STREAM_END = object()    # sentinel that closes a subscriber queue
+STREAM_ERROR = object()  # the background run failed; session.error says why (stream stays open)
+
+
+def total_turns(topics: Tuple[str, ...]) -> int:
+    return len(_OPENING_TURNS) + len(topics) * len(_ROUND_TURNS) + len(_CLOSING_TURNS)
+
+
+def phase_at(topics: Tuple[str, ...], index: int) -> Tuple[str, str, str, Optional[str], Optional[int]]:
+    """
+    Return (phase, speaker, prompt_template, topic, round) for turn `index`.
+    Computed on demand so idle sessions don't carry a schedule list.
+    """
+    if index < len(_OPENING_TURNS):
+        speaker, template = _OPENING_TURNS[index]
+        return "opening", speaker, template, None, None
+    index -= len(_OPENING_TURNS)
+
+    round_idx, turn_idx = divmod(index, len(_ROUND_TURNS))
+    if round_idx < len(topics):
+        speaker, template = _ROUND_TURNS[turn_idx]
+        return "round", speaker, template, topics[round_idx], round_idx + 1
+    index -= len(topics) * len(_ROUND_TURNS)
+
+    speaker, template = _CLOSING_TURNS[index]
+    return "closing", speaker, template, None, None
+
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(pct / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+class DebateSession:
+    """
+    One isolated debate: its own agents, phase position and turn log.
+    Turns are pushed to every subscriber queue as soon as they are generated.
+    """
+
+    __slots__ = (
+        "id", "topics", "llm", "candidates", "created", "last_active",
+        "_agents", "_index", "_last_message", "_lock", "_step_lock", "_running", "_cancelled",
+        "turns", "latencies", "_subscribers", "error", "_recorder", "transcript",
+    )
+
+    def __init__(self, llm: AzureLLM, topics: Optional[Tuple[str, ...]] = None,
+                 session_id: Optional[str] = None, candidates: int = 1,
+                 transcript: Optional[TranscriptWriter] = None):
+        self.id = session_id or uuid.uuid4().hex[:12]
+        self.topics = tuple(topics or DEFAULT_TOPICS)
+        self.llm = llm
+        self.candidates = candidates
+        self.created = time.time()
+        self.last_active = self.created
+
+        self._agents: Optional[Dict[str, Any]] = None
+        self._index = 0
+        self._last_message = ""
+        self._lock = threading.Lock()       # guards turns/subscribers (held briefly)
+        self._step_lock = threading.Lock()  # serializes generation (held across the LLM call)
+        self._running = False
+        self._cancelled = False             # set by cancel(); checked before every turn
+
+        self.turns: List[Dict[str, Any]] = []
+        self.latencies: List[float] = []
+        self._subscribers: List[queue.Queue] = []
+        self.error: Optional[str] = None
+        self.transcript = transcript
+        self._recorder: Optional[RecordingLLM] = None
+
+    # ---------------- Phase machine ----------------
+
+    @property
+    def finished(self) -> bool:
+        return self._index >= total_turns(self.topics)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def _agent(self, speaker: str):
+        if self._agents is None:
+            index = NGramIndex()  # one repetition index per debate, shared by both sides
+            llm = self.llm
+            if self.transcript is not None:
+                llm = self._recorder = RecordingLLM(self.llm)
+            self._agents = {
+                "biden": BidenAgent(llm=llm, candidates=self.candidates, ngram_index=index),
+                "trump": TrumpAgent(llm=llm, candidates=self.candidates, ngram_index=index),
+            }
+        return self._agents[speaker]
+
+    def step(self) -> Optional[Dict[str, Any]]:
+        """Generate the next turn. Returns None once the debate is over or cancelled."""
+        with self._step_lock:
+            if self.finished or self._cancelled:
+                return None
+            phase, speaker, template, topic, round_num = phase_at(self.topics, self._index)
+            prompt = template.format(opponent=self._last_message, topic=topic)
+            state = {"topic": topic or "general", "round": round_num}
+            agent = self._agent(speaker)
+
+            start = time.perf_counter()
+            calls: List[Dict[str, Any]] = []
+            try:
+                response = agent.respond(prompt, dict(state))
+            finally:
+                # Always drain, so calls from a failed turn can't be filed under the next one
+                if self._recorder is not None:
+                    calls = self._recorder.take()
+            latency = time.perf_counter() - start
+
+            if self.transcript is not None:
+                self.transcript.write_turn(speaker, phase, prompt, state, response, calls, latency)
+
+            turn = {
+                "index": self._index,
+                "phase": phase,
+                "topic": topic,
+                "round": round_num,
+                "speaker": speaker,
+                "text": response,
+                "latency_s": round(latency, 4),
+            }
+            with self._lock:
+                self._index += 1
+                self._last_message = response
+                self.error = None  # a turn went through, any earlier failure is resolved
+                self.turns.append(turn)
+                self.latencies.append(latency)
+                self.last_active = time.time()
+                subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            q.put(turn)
+        if self.finished:
+            self._close_streams()
+            self._close_transcript()
+        return turn
+
+    def run(self) -> None:
+        """Play every remaining turn (called on the shared worker pool)."""
+        try:
+            while self.step() is not None:
+                pass
+        except Exception as exc:
+            # Not fatal: the failed turn can be retried, so streams and transcript stay open
+            with self._lock:
+                self.error = f"{type(exc).__name__}: {exc}"
+                subscribers = list(self._subscribers)
+            for q in subscribers:
+                q.put(STREAM_ERROR)
+        finally:
+            with self._lock:
+                self._running = False
+                cancelled = self._cancelled
+            if cancelled:
+                self._close_transcript()  # the loop has exited, nothing writes anymore
+
+    def start(self, executor: Executor) -> bool:
+        """
+        Schedule run() on the shared pool. False if already running, finished or
+        cancelled. A session whose last run failed may be started again.
+        """
+        with self._lock:
+            if self._running or self.finished or self._cancelled:
+                return False
+            self._running = True
+            self.error = None
+        executor.submit(self.run)
+        return True
+
+    def cancel(self) -> None:
+        """
+        Stop generating: no further turns start (an in-flight one still finishes).
+        The transcript is closed by run() once its loop exits, or here if idle.
+        """
+        with self._lock:
+            self._cancelled = True
+            running = self._running
+        self._close_streams()
+        if not running:
+            with self._step_lock:  # wait out a synchronous /step in flight
+                self._close_transcript()
+
+    def _close_transcript(self) -> None:
+        if self.transcript is not None:
+            self.transcript.close()
+
+    # ---------------- Streaming ----------------
+
+    def subscribe(self) -> Tuple[List[Dict[str, Any]], queue.Queue]:
+        """
+        Return (turns so far, queue of future turns). The queue ends with STREAM_END
+        once the debate finishes or is closed; a failed run puts STREAM_ERROR instead.
+        """
+        q: queue.Queue = queue.Queue()
+        with self._lock:
+            backlog = list(self.turns)
+            if self.finished or self._cancelled:
+                q.put(STREAM_END)
+            else:
+                self._subscribers.append(q)
+        return backlog, q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _close_streams(self) -> None:
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for q in subscribers:
+            q.put(STREAM_END)
+
+    # ---------------- Reporting ----------------
+
+    def stats(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+        per_phase: Dict[str, List[float]] = {}
+        for turn in self.turns:
+            per_phase.setdefault(turn["phase"], []).append(turn["latency_s"])
+        return {
+            "id": self.id,
+            "topics": list(self.topics),
+            "candidates": self.candidates,
+            "turns": len(self.turns),
+            "total_turns": total_turns(self.topics),
+            "running": self._running,
+            "finished": self.finished,
+            "error": self.error,
+            "latency_s": {
+                "mean": round(sum(lat) / len(lat), 4) if lat else 0.0,
+                "p50": round(_percentile(lat, 50), 4),
+                "p95": round(_percentile(lat, 95), 4),
+                "max": round(lat[-1], 4) if lat else 0.0,
+            },
+            "phase_mean_s": {p: round(sum(v) / len(v), 4) for p, v in per_phase.items()},
+            "idle_s": round(time.time() - self.last_active, 1),
+        }
+
+
+class SessionManager:
+    """
+    Registry of live sessions plus the resources they share.
+    Sessions idle for longer than idle_ttl seconds are dropped by reap_idle(),
+    on every create() and, once start_reaper() is called, on a timer.
+    """
+
+    def __init__(self, llm: AzureLLM, executor: Executor, max_sessions: int = 500,
+                 idle_ttl: float = 3600.0, candidates: int = 1, record_dir: Optional[str] = None):
+        self.llm = llm
+        self.candidates = candidates
+        self.record_dir = record_dir
+        self.executor = executor
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: Dict[str, DebateSession] = {}
+        self._lock = threading.Lock()
+        self._reaper_stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def create(self, topics: Optional[List[str]] = None, candidates: Optional[int] = None) -> DebateSession:
+        self.reap_idle()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise RuntimeError(f"session limit reached ({self.max_sessions})")
+            session = DebateSession(self.llm, tuple(topics) if topics else None,
+                                    candidates=candidates or self.candidates)
+            if self.record_dir:
+                session.transcript = TranscriptWriter(
+                    os.path.join(self.record_dir, f"{session.id}.jsonl"),
+                    label=f"session {session.id}",
+                    meta={"topics": list(session.topics), "candidates": session.candidates},
+                )
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[DebateSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.cancel()
+        return True
+
+    def reap_idle(self) -> int:
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            stale = [sid for sid, s in self._sessions.items() if s.last_active < cutoff and not s._running]
+        for sid in stale:
+            self.close(sid)
+        return len(stale)
+
+    def start_reaper(self, interval: Optional[float] = None) -> None:
+        """Run reap_idle() every `interval` seconds (default: min(60, idle_ttl / 2))."""
+        if self._reaper is not None:
+            return
+        if interval is None:
+            interval = max(1.0, min(60.0, self.idle_ttl / 2))
+        self._reaper_stop.clear()
+        self._reaper = threading.Thread(target=self._reap_loop, args=(interval,),
+                                        name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self) -> None:
+        if self._reaper is None:
+            return
+        self._reaper_stop.set()
+        self._reaper.join()
+        self._reaper = None
+
+    def _reap_loop(self, interval: float) -> None:
+        while not self._reaper_stop.wait(interval):
+            self.reap_idle()
+
+    def sessions(self) -> List[DebateSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = self.sessions()
+        lat = sorted(l for s in sessions for l in s.latencies)
+        return {
+            "sessions": len(sessions),
+            "running": sum(1 for s in sessions if s._running),
+            "turns": len(lat),
+            "latency_s": {
+                "mean": round(sum(lat) / len(lat), 4) if lat else 0.0,
+                "p50": round(_percentile(lat, 50), 4),
+                "p95": round(_percentile(lat, 95), 4),
+            },
+        }
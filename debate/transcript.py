@@ -0,0 +1,458 @@
+"""
+transcript.py
+
+Append-only debate transcripts, replay and latency/prompt-size comparison.
+
+File format:
+    <name>.jsonl      one compact JSON record per line; line 0 is a header,
+                      then one "turn" record per turn (text, persona, phase,
+                      every LLM call's messages + sampling params + outputs,
+                      timing, token usage). Message contents of BLOB_MIN_CHARS
+                      or more (system prompts, history re-sent every turn) are
+                      written once as a "blob" record and later referenced by
+                      its byte offset: {"role": ..., "ref": offset}.
+    <name>.jsonl.idx  little-endian uint64 byte offset of the header and every
+                      turn, so reader[i] is one seek + one line read (plus one
+                      per referenced blob, cached). Rebuilt from the .jsonl if
+                      missing or short (e.g. after a crash); the writer saves
+                      the rebuilt index before appending to an existing file.
+
+CLI:
+    python -m debate.transcript show    run.jsonl [turn]
+    python -m debate.transcript replay  run.jsonl replay.jsonl [--seed 0] [--force]
+    python -m debate.transcript compare before.jsonl after.jsonl
+
+Replay re-runs the current agents' prompt building against a recorded run,
+with ReplayLLM handing back the recorded outputs instead of calling Azure.
+Replaying the same recording before and after a change (same seed) and
+comparing the two replays shows whether prompts got bigger or local
+per-turn work got slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+from agents import BidenAgent, TrumpAgent
+from agents.engine import PersonaAgent
+from agents.personas import PERSONAS
+from agents.repetition import NGramIndex
+
+VERSION = 1
+BLOB_MIN_CHARS = 256
+_OFFSET = struct.Struct("<Q")
+_BLOB_PREFIX = b'{"type":"blob"'
+
+AGENT_CLASSES = {"biden": BidenAgent, "trump": TrumpAgent}
+
+
+def _prompt_chars(calls: List[Dict[str, Any]]) -> int:
+    return sum(len(m["content"]) for c in calls for m in c["messages"])
+
+
+def _sum_usage(calls: List[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    usages = [c["usage"] for c in calls if c.get("usage")]
+    if not usages:
+        return None
+    return {k: sum(u[k] for u in usages) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+def _trim_partial_line(path: str) -> None:
+    """Drop a half-written last record (crash mid-write) so appends start on a fresh line."""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        pos, end = size, 0
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            nl = f.read(step).rfind(b"\n")
+            if nl != -1:
+                end = pos - step + nl + 1
+                break
+            pos -= step
+        if end != size:
+            f.truncate(end)
+
+
+# ---------------- LLM wrappers ----------------
+
+class RecordingLLM:
+    """Wraps an AzureLLM (or ReplayLLM) and keeps every call made since the last take()."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.calls: List[Dict[str, Any]] = []
+
+    def chat(self, messages, **params) -> str:
+        start = time.perf_counter()
+        out = self.llm.chat(messages, **params)
+        self._log(messages, params, 1, [out], time.perf_counter() - start)
+        return out
+
+    def chat_candidates(self, messages, n: int, **params) -> List[str]:
+        start = time.perf_counter()
+        outs = self.llm.chat_candidates(messages, n, **params)
+        self._log(messages, params, n, outs, time.perf_counter() - start)
+        return outs
+
+    def _log(self, messages, params, n, outputs, elapsed) -> None:
+        self.calls.append({
+            "messages": [dict(m) for m in messages],
+            "params": params,
+            "n": n,
+            "outputs": outputs,
+            "latency_s": round(elapsed, 6),
+            "usage": getattr(self.llm, "last_usage", None),
+        })
+
+    def take(self) -> List[Dict[str, Any]]:
+        calls, self.calls = self.calls, []
+        return calls
+
+
+class ReplayLLM:
+    """Stand-in LLM: returns the outputs recorded for the current turn, in call order."""
+
+    last_usage = None
+
+    def __init__(self):
+        self._calls: List[Dict[str, Any]] = []
+        self._fallback = ""
+
+    def load_turn(self, turn: Dict[str, Any]) -> None:
+        self._calls = list(turn.get("calls", []))
+        self._fallback = turn["text"]
+
+    def _next(self, n: int) -> List[str]:
+        outs = self._calls.pop(0)["outputs"] if self._calls else []
+        outs = list(outs) or [self._fallback]
+        return (outs * n)[:n]
+
+    def chat(self, messages, **params) -> str:
+        return self._next(1)[0]
+
+    def chat_candidates(self, messages, n: int, **params) -> List[str]:
+        return self._next(n)
+
+
+# ---------------- Store ----------------
+
+class TranscriptWriter:
+    """
+    Append-only writer. One record per line, offset appended to the .idx file.
+    One file holds one run: an existing non-empty path is refused unless
+    append=True (resume the same run under its original header).
+    """
+
+    def __init__(self, path: str, label: str = "", meta: Optional[Dict[str, Any]] = None,
+                 append: bool = False):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._blobs: Dict[str, int] = {}  # content -> byte offset of its blob record
+        self.turns = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            if not append:
+                raise FileExistsError(f"{path} already holds a transcript; pick a new path")
+            # Appending to an existing run: the reader rebuilds a short/missing index
+            # in memory; write it back so new offsets don't land after a gap.
+            _trim_partial_line(path)
+            reader = TranscriptReader(path)
+            self.turns = len(reader)
+            offsets = array("Q", reader._offsets)
+            reader.close()
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            with open(path + ".idx", "wb") as f:
+                f.write(offsets.tobytes())
+
+        self._data = open(path, "ab")
+        self._idx = open(path + ".idx", "ab")
+        if self._data.tell() == 0:
+            self._append({"type": "header", "version": VERSION, "created": time.time(),
+                          "label": label, "meta": meta or {}})
+
+    def _append(self, record: Dict[str, Any], indexed: bool = True) -> int:
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            offset = self._data.tell()
+            if indexed:
+                self._idx.write(_OFFSET.pack(offset))
+            self._data.write(line)
+            self._data.flush()
+            self._idx.flush()
+        return offset
+
+    def _compact(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        for call in calls:
+            messages = []
+            for m in call["messages"]:
+                content = m["content"]
+                if len(content) < BLOB_MIN_CHARS:
+                    messages.append(m)
+                    continue
+                ref = self._blobs.get(content)
+                if ref is None:
+                    ref = self._blobs[content] = self._append({"type": "blob", "content": content}, indexed=False)
+                messages.append({"role": m["role"], "ref": ref})
+            out.append({**call, "messages": messages})
+        return out
+
+    def write_turn(self, persona: str, phase: str, prompt: str, state: Dict[str, Any], text: str,
+                   calls: List[Dict[str, Any]], latency_s: float) -> None:
+        llm_s = sum(c["latency_s"] for c in calls)
+        self._append({
+            "type": "turn",
+            "i": self.turns,
+            "persona": persona,
+            "phase": phase,
+            "topic": state.get("topic"),
+            "round": state.get("round"),
+            "input": prompt,
+            "state": state,
+            "text": text,
+            "calls": self._compact(calls),
+            "latency_s": round(latency_s, 6),
+            "llm_s": round(llm_s, 6),
+            "local_s": round(max(latency_s - llm_s, 0.0), 6),
+            "prompt_chars": _prompt_chars(calls),
+            "usage": _sum_usage(calls),
+        })
+        self.turns += 1
+
+    def close(self) -> None:
+        self._data.close()
+        self._idx.close()
+
+
+class TranscriptReader:
+    """Random access over a transcript: reader.header, len(reader), reader[i], iter(reader)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = self._load_index()
+        self._data = open(path, "rb")
+        self._blob_cache: Dict[int, str] = {}
+        try:
+            self.header = self._read(0) if self._offsets else {}
+        except ValueError:  # not JSON
+            self.header = {}
+        if self.header.get("type") != "header":
+            self._data.close()
+            raise ValueError(f"{path} is not a transcript (no header record)")
+
+    def _load_index(self) -> array:
+        offsets = array("Q")
+        idx_path = self.path + ".idx"
+        if os.path.exists(idx_path):
+            with open(idx_path, "rb") as f:
+                raw = f.read()
+            offsets.frombytes(raw[: len(raw) - len(raw) % _OFFSET.size])
+            if sys.byteorder != "little":
+                offsets.byteswap()
+        # Index may be short (crash between writes): rescan from the last known record.
+        # A trailing partial line is ignored.
+        start = offsets.pop() if offsets else 0
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                if line.endswith(b"\n") and not line.startswith(_BLOB_PREFIX):
+                    offsets.append(pos)
+                pos += len(line)
+        return offsets
+
+    def _read(self, record: int) -> Dict[str, Any]:
+        rec = self._read_at(self._offsets[record])
+        for call in rec.get("calls", []):
+            call["messages"] = [self._resolve(m) for m in call["messages"]]
+        return rec
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        self._data.seek(offset)
+        return json.loads(self._data.readline())
+
+    def _resolve(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if "ref" not in message:
+            return message
+        ref = message["ref"]
+        if ref not in self._blob_cache:
+            self._blob_cache[ref] = self._read_at(ref)["content"]
+        return {"role": message["role"], "content": self._blob_cache[ref]}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1  # minus header
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._read(i + 1)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self) -> None:
+        self._data.close()
+
+
+# ---------------- Replay ----------------
+
+def replay(src: str, dst: str, seed: int = 0, force: bool = False) -> str:
+    """
+    Re-run prompt building for every turn of src against ReplayLLM; write the result to dst.
+    An existing dst is refused (FileExistsError) unless force=True; dst may never be src.
+    """
+    if os.path.abspath(dst) == os.path.abspath(src) or (
+            os.path.exists(dst) and os.path.samefile(src, dst)):
+        raise ValueError(f"replay would overwrite its own source {src}")
+    if force:
+        for path in (dst, dst + ".idx"):
+            if os.path.exists(path):
+                os.remove(path)
+    reader = TranscriptReader(src)
+    try:
+        writer = TranscriptWriter(dst, label=f"replay of {os.path.basename(src)}",
+                                  meta={"source": src, "seed": seed, "source_label": reader.header.get("label", "")})
+    except FileExistsError:
+        reader.close()
+        raise
+
+    # Same candidate count the recorded agents used
+    candidates: Dict[str, int] = {}
+    for turn in reader:
+        n = max((c["n"] for c in turn["calls"]), default=1)
+        candidates[turn["persona"]] = max(candidates.get(turn["persona"], 1), n)
+
+    stub = ReplayLLM()
+    recorder = RecordingLLM(stub)
+    index = NGramIndex()
+    agents: Dict[str, PersonaAgent] = {}
+    random.seed(seed)  # format sampling must match between replays
+
+    for turn in reader:
+        persona = turn["persona"]
+        if persona not in agents:
+            cls = AGENT_CLASSES.get(persona)
+            n = candidates[persona]
+            agents[persona] = (cls(llm=recorder, candidates=n, ngram_index=index) if cls
+                               else PersonaAgent(PERSONAS[persona], llm=recorder, candidates=n, ngram_index=index))
+        stub.load_turn(turn)
+        state = turn.get("state") or {}
+        start = time.perf_counter()
+        text = agents[persona].respond(turn["input"], dict(state))
+        writer.write_turn(persona, turn["phase"], turn["input"], state, text, recorder.take(),
+                          time.perf_counter() - start)
+
+    writer.close()
+    reader.close()
+    return dst
+
+
+# ---------------- Comparison ----------------
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Per-phase (and "all") mean latency, local time and prompt size. prompt_tokens
+    is only present for groups with recorded token usage (never for replays).
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    reader = TranscriptReader(path)
+    for turn in reader:
+        groups.setdefault(f"{turn['persona']}:{turn['phase']}", []).append(turn)
+        groups.setdefault("all", []).append(turn)
+    reader.close()
+
+    out: Dict[str, Dict[str, float]] = {}
+    for key, turns in groups.items():
+        n = len(turns)
+        out[key] = {
+            "turns": n,
+            "latency_s": sum(t["latency_s"] for t in turns) / n,
+            "local_s": sum(t["local_s"] for t in turns) / n,
+            "prompt_chars": sum(t["prompt_chars"] for t in turns) / n,
+        }
+        tokens = [t["usage"]["prompt_tokens"] for t in turns if t["usage"]]
+        if tokens:
+            out[key]["prompt_tokens"] = sum(tokens) / len(tokens)
+    return out
+
+
+def compare(a: str, b: str) -> List[Dict[str, Any]]:
+    """
+    Rows of (group, metric, a, b, delta %) for every group present in both runs.
+    delta % is inf when a is 0 and b isn't; prompt_tokens only shows up when
+    both runs recorded token usage.
+    """
+    sa, sb = summarize(a), summarize(b)
+    rows = []
+    for key in sorted(set(sa) & set(sb), key=lambda k: (k != "all", k)):
+        for metric in ("latency_s", "local_s", "prompt_chars", "prompt_tokens"):
+            if metric not in sa[key] or metric not in sb[key]:
+                continue
+            va, vb = sa[key][metric], sb[key][metric]
+            if va:
+                pct = (vb - va) / va * 100.0
+            else:
+                pct = math.inf if vb else 0.0
+            rows.append({"group": key, "metric": metric, "a": va, "b": vb, "delta_pct": pct})
+    return rows
+
+
+def _print_compare(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'group':<22} {'metric':<14} {'before':>12} {'after':>12} {'delta':>9}")
+    for r in rows:
+        print(f"{r['group']:<22} {r['metric']:<14} {r['a']:>12.4f} {r['b']:>12.4f} {r['delta_pct']:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, replay and compare debate transcripts.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("show")
+    p.add_argument("path")
+    p.add_argument("turn", type=int, nargs="?")
+    p = sub.add_parser("replay")
+    p.add_argument("src")
+    p.add_argument("dst")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--force", action="store_true", help="overwrite dst if it already exists")
+    p = sub.add_parser("compare")
+    p.add_argument("a")
+    p.add_argument("b")
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "show":
+            reader = TranscriptReader(args.path)
+            if args.turn is not None:
+                print(json.dumps(reader[args.turn], indent=2, ensure_ascii=False))
+            else:
+                print(json.dumps(reader.header))
+                for t in reader:
+                    print(f"[{t['i']:>3}] {t['persona']:<6} {t['phase']:<8} {t['latency_s']:.3f}s "
+                          f"{t['prompt_chars']:>6} chars  {t['text'][:60]!r}")
+            reader.close()
+        elif args.cmd == "replay":
+            print(replay(args.src, args.dst, args.seed, args.force))
+        else:
+            _print_compare(compare(args.a, args.b))
+    except (FileExistsError, ValueError) as exc:
+        parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,44 @@
-from sys import argv
+import argparse
 from debate.debate_controller import DebateController
+from debate.profiler import SamplingProfiler
 
 def main():
-    persona = argv[1] if len(argv) == 2 else None
+    parser = argparse.ArgumentParser(usage="python main.py biden   OR   python main.py trump")
+    parser.add_argument("persona", nargs="?")
+    parser.add_argument("--record", metavar="PATH", help="write a transcript of this debate (debate/transcript.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample all threads; write collapsed stacks + top functions at debate end")
+    parser.add_argument("--profile-out", metavar="PATH", default="profile.collapsed",
+                        help="where --profile writes collapsed stacks (summary goes to PATH.top.txt)")
+    parser.add_argument("--profile-interval", type=float, default=5.0, help="sampling interval in ms")
+    args = parser.parse_args()
+
     debate_topics = ["economics", "healthcare", "immigration"]
-    if persona == "biden":
-        print("Running Biden persona...")
-        DebateController("biden", topics=debate_topics).run_debate()
-    elif persona == "trump":
-        print("Running Trump persona...")
-        DebateController("trump", topics=debate_topics).run_debate()
-    else:
+    if args.persona not in ("biden", "trump"):
         print("Usage: python main.py biden   OR   python main.py trump")
+        return
+
+    print(f"Running {args.persona.capitalize()} persona...")
+    try:
+        controller = DebateController(args.persona, topics=debate_topics, record=args.record)
+    except FileExistsError as exc:
+        print(exc)
+        return
+
+    profiler = SamplingProfiler(interval=args.profile_interval / 1000.0) if args.profile else None
+    if profiler:
+        if not profiler.cpu_split:
+            print("[Profile] No per-thread CPU clocks on this platform (Linux only): "
+                  "recording stacks without the cpu/wait split.")
+        profiler.start()
+    try:
+        controller.run_debate()
+    finally:
+        if profiler:
+            profiler.stop()
+            stacks_path, summary_path = profiler.write(args.profile_out)
+            print(profiler.summary(top=15))
+            print(f"\n[Profile] {stacks_path} (flame graph input), {summary_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -51,7 +51,7 @@ def start():
     if speech_recognizer is None:
         set_up()
     speech_recognition_thread = threading.Thread(
-        target=speech_recognition_thread_function, args=(None,))
+        target=speech_recognition_thread_function, args=(None,), name="stt")
     speech_recognition_thread.start()
 
 def stop():
@@ -62,7 +62,7 @@ def start(voice=TRUMP_VOICE):
     global speech_synthesis_thread
     set_up(voice=voice)
     speech_synthesis_thread = threading.Thread(
-        target=speech_synthesis_thread_function, args=(None,))
+        target=speech_synthesis_thread_function, args=(None,), name="tts")
     speech_synthesis_thread.start()
 
 def stop():
@@ -21,14 +21,17 @@ Make sure you have:
 
 from agents.biden_agent import BidenAgent
 from agents.trump_agent import TrumpAgent
+from agents.repetition import NGramIndex
 
 TOPICS = [
     ("economy", "Inflation is out of control."),
 ]
 
 def run_debate(total_turns=10):
-    biden = BidenAgent()
-    trump = TrumpAgent()
+    # Both sides share one repetition index, like a real debate session
+    index = NGramIndex()
+    biden = BidenAgent(ngram_index=index)
+    trump = TrumpAgent(ngram_index=index)
 
     topic, seed = TOPICS[0]
 